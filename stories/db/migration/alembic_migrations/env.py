@@ -16,6 +16,8 @@
 
 # from logging.config import fileConfig
 
+import contextlib
+
 from alembic import context
 from sqlalchemy import create_engine, pool
 
@@ -53,6 +55,35 @@ def run_migrations_offline():
         context.run_migrations()
 
 
+@contextlib.contextmanager
+def sqlite_bulk_ddl(connection):
+    """Skip journal and fsync work on SQLite while the migrations run.
+
+    PRAGMA synchronous cannot be changed inside a transaction, so this
+    has to wrap context.begin_transaction(). The previous settings are
+    written back afterwards. A WAL database keeps its journal mode, as
+    leaving WAL needs every other connection to the database closed.
+
+    """
+    if connection.dialect.name != 'sqlite':
+        yield
+        return
+
+    pragmas = (('journal_mode', 'MEMORY'), ('synchronous', 'OFF'))
+    saved = []
+    for name, value in pragmas:
+        current = connection.execute('PRAGMA %s' % name).scalar()
+        if name == 'journal_mode' and current.lower() == 'wal':
+            continue
+        saved.append((name, current))
+        connection.execute('PRAGMA %s = %s' % (name, value))
+    try:
+        yield
+    finally:
+        for name, value in reversed(saved):
+            connection.execute('PRAGMA %s = %s' % (name, value))
+
+
 def run_migrations_online():
     """Run migrations in 'online' mode.
 
@@ -71,8 +102,9 @@ def run_migrations_online():
     )
 
     try:
-        with context.begin_transaction():
-            context.run_migrations()
+        with sqlite_bulk_ddl(connection):
+            with context.begin_transaction():
+                context.run_migrations()
     finally:
         connection.close()
 
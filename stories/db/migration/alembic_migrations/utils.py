@@ -0,0 +1,33 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Helpers shared by the alembic revisions
+"""
+
+from alembic import op
+
+SEED_CHUNK_SIZE = 5000
+
+
+def seed(table, rows, chunk_size=SEED_CHUNK_SIZE):
+    """Load seed data into a table.
+
+    Revisions shipping data should use this rather than one op.execute()
+    per row: each chunk of rows is sent as a single executemany() INSERT.
+
+    :param table:      Table (or sa.sql.table()) receiving the rows
+    :param rows:       List of dicts, one per row
+    :param chunk_size: Number of rows sent per statement
+    """
+    for start in range(0, len(rows), chunk_size):
+        op.bulk_insert(table, rows[start:start + chunk_size])
@@ -28,8 +28,54 @@ from alembic import op
 import sqlalchemy as sa
 
 
+# The uniq_* names are standalone unique indexes rather than UNIQUE
+# constraints inside CREATE TABLE, so that disable_unique_indexes() can
+# drop them around bulk loads. All indexes are created by
+# _create_indexes() right after the tables.
+_UNIQUE_INDEXES = (
+    ('uniq_branch0name', 'branches', ['name']),
+    ('uniq_group0name', 'groups', ['name']),
+    ('uniq_user0email', 'users', ['email']),
+    ('uniq_user0name', 'users', ['name']),
+    ('uniq_team0name', 'teams', ['name']),
+    ('uniq_milestone0name', 'milestones', ['name']),
+    ('uniq_project0name', 'projects', ['name']),
+    ('uniq_story_tags0name', 'storytags', ['name']),
+)
+
+_INDEXES = (
+    ('ix_team_membership_team_user', 'team_membership',
+     ['team_id', 'user_id']),
+    ('ix_project_groups_keyword_project', 'project_groups',
+     ['keyword_id', 'project_id']),
+    ('ix_stories_creator_id', 'stories', ['creator_id']),
+    ('ix_milestones_branch_id', 'milestones', ['branch_id']),
+    ('ix_projects_team_id', 'projects', ['team_id']),
+    ('ix_tasks_story_id', 'tasks', ['story_id']),
+    ('ix_tasks_project_id', 'tasks', ['project_id']),
+    ('ix_tasks_assignee_id', 'tasks', ['assignee_id']),
+    ('ix_tasks_milestone_id', 'tasks', ['milestone_id']),
+    ('ix_comments_story_id', 'comments', ['story_id']),
+    ('ix_comments_author_id', 'comments', ['author_id']),
+    ('ix_storytags_story_id', 'storytags', ['story_id']),
+)
+
+
 def upgrade(active_plugins=None, options=None):
 
+    _create_tables()
+    _create_indexes()
+
+
+def _create_indexes():
+    for name, table_name, columns in _UNIQUE_INDEXES:
+        op.create_index(name, table_name, columns, unique=True)
+    for name, table_name, columns in _INDEXES:
+        op.create_index(name, table_name, columns)
+
+
+def _create_tables():
+
     op.create_table(
         'branches',
         sa.Column('id', sa.Integer(), nullable=False),
@@ -42,8 +88,7 @@ def upgrade(active_plugins=None, options=None):
                 'master', 'release', 'stable', 'unsupported',
                 name='branch_status'), nullable=True),
         sa.Column('release_date', sa.DateTime(), nullable=True),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('name', name='uniq_branch0name')
+        sa.PrimaryKeyConstraint('id')
     )
     op.create_table(
         'groups',
@@ -52,8 +97,7 @@ def upgrade(active_plugins=None, options=None):
         sa.Column('updated_at', sa.DateTime(), nullable=True),
         sa.Column('name', sa.String(length=50), nullable=True),
         sa.Column('title', sa.Unicode(length=100), nullable=True),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('name', name='uniq_group0name')
+        sa.PrimaryKeyConstraint('id')
     )
     op.create_table(
         'users',
@@ -62,9 +106,7 @@ def upgrade(active_plugins=None, options=None):
         sa.Column('updated_at', sa.DateTime(), nullable=True),
         sa.Column('name', sa.Unicode(length=255), nullable=True),
         sa.Column('email', sa.String(length=255), nullable=True),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('email', name='uniq_user0email'),
-        sa.UniqueConstraint('name', name='uniq_user0name')
+        sa.PrimaryKeyConstraint('id')
     )
     op.create_table(
         'teams',
@@ -72,16 +114,15 @@ def upgrade(active_plugins=None, options=None):
         sa.Column('created_at', sa.DateTime(), nullable=True),
         sa.Column('updated_at', sa.DateTime(), nullable=True),
         sa.Column('name', sa.Unicode(length=255), nullable=True),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('name', name='uniq_team0name')
+        sa.PrimaryKeyConstraint('id')
     )
     op.create_table(
         'team_membership',
-        sa.Column('user_id', sa.Integer(), nullable=True),
-        sa.Column('team_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
         sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
         sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
-        sa.PrimaryKeyConstraint()
+        sa.PrimaryKeyConstraint('user_id', 'team_id')
     )
     op.create_table(
         'stories',
@@ -110,8 +151,7 @@ def upgrade(active_plugins=None, options=None):
         sa.Column('released', sa.Boolean(), nullable=True),
         sa.Column('undefined', sa.Boolean(), nullable=True),
         sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('name', name='uniq_milestone0name')
+        sa.PrimaryKeyConstraint('id')
     )
     op.create_table(
         'projects',
@@ -122,16 +162,15 @@ def upgrade(active_plugins=None, options=None):
         sa.Column('description', sa.Unicode(length=100), nullable=True),
         sa.Column('team_id', sa.Integer(), nullable=True),
         sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('name', name='uniq_project0name')
+        sa.PrimaryKeyConstraint('id')
     )
     op.create_table(
         'project_groups',
-        sa.Column('project_id', sa.Integer(), nullable=True),
-        sa.Column('keyword_id', sa.Integer(), nullable=True),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), nullable=False),
         sa.ForeignKeyConstraint(['keyword_id'], ['groups.id'], ),
         sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
-        sa.PrimaryKeyConstraint()
+        sa.PrimaryKeyConstraint('project_id', 'keyword_id')
     )
     op.create_table(
         'tasks',
@@ -173,8 +212,7 @@ def upgrade(active_plugins=None, options=None):
         sa.Column('name', sa.String(length=20), nullable=True),
         sa.Column('story_id', sa.Integer(), nullable=True),
         sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('name', name='uniq_story_tags0name')
+        sa.PrimaryKeyConstraint('id')
     )
 
 
@@ -0,0 +1,80 @@
+# Copyright 2013 Hewlett-Packard Development Company, L.P.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Database access helpers for stories
+"""
+
+import contextlib
+
+from stories.openstack.common.db.sqlalchemy import session as db_session
+
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+def bulk_insert(model, rows, session=None,
+                chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """Insert many rows of a model without going through the ORM.
+
+    The rows are plain dicts keyed by column name. They are sent to the
+    table of the model as executemany() batches of chunk_size rows, which
+    skips instance construction and the unit of work flush entirely.
+
+    :param model:      Model class whose table receives the rows
+    :param rows:       List of dicts, one per row
+    :param session:    Session to use, a new one is created if None
+    :param chunk_size: Number of rows sent per statement
+    """
+    if session is None:
+        session = db_session.get_session()
+
+    insert = model.__table__.insert()
+    with session.begin(subtransactions=True):
+        for start in range(0, len(rows), chunk_size):
+            session.execute(insert, rows[start:start + chunk_size])
+
+
+@contextlib.contextmanager
+def disable_unique_indexes(model, session=None):
+    """Drop the unique indexes of a model around a bulk load.
+
+    The indexes are rebuilt in a single pass when the block completes,
+    which is cheaper than maintaining them for every inserted row.
+    Rebuilding fails if the loaded data contains duplicates.
+
+    Dropping, loading and rebuilding all happen in one session
+    transaction, so they share a single connection. The session is
+    yielded for the rows to be loaded within that transaction::
+
+        with disable_unique_indexes(models.User) as session:
+            bulk_insert(models.User, rows, session=session)
+
+    If the block raises, the transaction is rolled back and the error is
+    propagated; the indexes are not rebuilt, so on backends without
+    transactional DDL (MySQL) they stay dropped.
+
+    :param model:   Model class whose unique indexes are dropped
+    :param session: Session to use, a new one is created if None
+    """
+    if session is None:
+        session = db_session.get_session()
+
+    indexes = [index for index in model.__table__.indexes if index.unique]
+    with session.begin(subtransactions=True):
+        connection = session.connection()
+        for index in indexes:
+            index.drop(bind=connection)
+        yield session
+        for index in indexes:
+            index.create(bind=connection)
@@ -21,7 +21,9 @@ import urlparse
 import warnings
 
 from oslo.config import cfg
+from sqlalchemy import exc as sa_exc
 from sqlalchemy.ext import declarative
+from sqlalchemy.orm import backref
 from sqlalchemy.orm import relationship
 from sqlalchemy import schema
 
@@ -39,7 +41,7 @@ from sqlalchemy import UnicodeText
 from stories.openstack.common.db.sqlalchemy import models
 
 # Turn SQLAlchemy warnings into errors
-warnings.simplefilter('error')
+warnings.filterwarnings('error', category=sa_exc.SAWarning)
 
 _sql_opts = [
     cfg.StrOpt('mysql_engine',
@@ -51,8 +53,19 @@ CONF = cfg.ConfigOpts()
 CONF.register_opts(_sql_opts, 'database')
 
 
+_ENGINE_NAMES = {}
+
+
+def _engine_name(connection):
+    engine_name = _ENGINE_NAMES.get(connection)
+    if engine_name is None:
+        engine_name = urlparse.urlparse(connection).scheme
+        _ENGINE_NAMES[connection] = engine_name
+    return engine_name
+
+
 def table_args():
-    engine_name = urlparse.urlparse(cfg.CONF.database_connection).scheme
+    engine_name = _engine_name(cfg.CONF.database_connection)
     if engine_name == 'mysql':
         return {'mysql_engine': cfg.CONF.mysql_engine,
                 'mysql_charset': "utf8"}
@@ -63,16 +76,31 @@ class IdMixin(object):
     id = Column(Integer, primary_key=True)
 
 
+class StoriesMeta(declarative.DeclarativeMeta):
+
+    def __init__(cls, classname, bases, dict_):
+        if ('_decl_class_registry' not in cls.__dict__ and
+                '__tablename__' not in cls.__dict__):
+            # NOTE(jkoelker) use the pluralized name of the class as the table
+            cls.__tablename__ = intern((classname + 's').lower())
+        super(StoriesMeta, cls).__init__(classname, bases, dict_)
+
+
 class StoriesBase(models.TimestampMixin,
                   IdMixin,
                   models.ModelBase):
 
     metadata = None
 
-    @declarative.declared_attr
-    def __tablename__(cls):
-        # NOTE(jkoelker) use the pluralized name of the class as the table
-        return cls.__name__.lower() + 's'
+    @classmethod
+    def __declare_last__(cls):
+        # NOTE: give every mapped class its own as_dict() returning a dict
+        # literal of its columns, so serializing a row runs no loop at all
+        source = 'def as_dict(self):\n    return {%s}\n' % ', '.join(
+            '%r: self.%s' % (c.name, c.key) for c in cls.__table__.columns)
+        namespace = {}
+        exec(source, namespace)
+        cls.as_dict = namespace['as_dict']
 
     def as_dict(self):
         d = {}
@@ -81,37 +109,44 @@ class StoriesBase(models.TimestampMixin,
         return d
 
 
-Base = declarative.declarative_base(cls=StoriesBase)
+Base = declarative.declarative_base(cls=StoriesBase, metaclass=StoriesMeta)
 
 team_membership = Table(
     'team_membership', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('team_id', Integer, ForeignKey('teams.id')),
+    Column('user_id', Integer, ForeignKey('users.id'),
+           primary_key=True, nullable=False),
+    Column('team_id', Integer, ForeignKey('teams.id'),
+           primary_key=True, nullable=False),
+    schema.Index('ix_team_membership_team_user', 'team_id', 'user_id'),
 )
 
 
 class User(Base):
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_user0name'),
-        schema.UniqueConstraint('email', name='uniq_user0email'),
+        schema.Index('uniq_user0name', 'name', unique=True),
+        schema.Index('uniq_user0email', 'email', unique=True),
     )
     name = Column(Unicode(255))
     email = Column(String(255))
     teams = relationship("Team", secondary="team_membership")
-    tasks = relationship('Task', backref='assignee')
+    tasks = relationship('Task', backref=backref('assignee', lazy='joined'))
 
 
 class Team(Base):
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_team0name'),
+        schema.Index('uniq_team0name', 'name', unique=True),
     )
     name = Column(Unicode(255))
     users = relationship("User", secondary="team_membership")
 
 project_groups = Table(
     'project_groups', Base.metadata,
-    Column('project_id', Integer, ForeignKey('projects.id')),
-    Column('keyword_id', Integer, ForeignKey('groups.id')),
+    Column('project_id', Integer, ForeignKey('projects.id'),
+           primary_key=True, nullable=False),
+    Column('keyword_id', Integer, ForeignKey('groups.id'),
+           primary_key=True, nullable=False),
+    schema.Index('ix_project_groups_keyword_project',
+                 'keyword_id', 'project_id'),
 )
 
 
@@ -120,24 +155,25 @@ class Project(Base):
     """Represents a software project."""
 
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_project0name'),
+        schema.Index('uniq_project0name', 'name', unique=True),
     )
 
     name = Column(String(50))
     description = Column(Unicode(100))
-    team_id = Column(Integer, ForeignKey('teams.id'))
-    team = relationship(Team, primaryjoin=team_id == Team.id)
+    team_id = Column(Integer, ForeignKey('teams.id'), index=True)
+    team = relationship(Team, primaryjoin=team_id == Team.id, lazy='joined')
     tasks = relationship('Task', backref='project')
 
 
 class Group(Base):
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_group0name'),
+        schema.Index('uniq_group0name', 'name', unique=True),
     )
 
     name = Column(String(50))
     title = Column(Unicode(100))
-    projects = relationship("Project", secondary="project_groups")
+    projects = relationship("Project", secondary="project_groups",
+                            lazy='subquery')
 
 
 class Branch(Base):
@@ -145,7 +181,7 @@ class Branch(Base):
     _BRANCH_STATUS = ('master', 'release', 'stable', 'unsupported')
     __tablename__ = 'branches'
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_branch0name'),
+        schema.Index('uniq_branch0name', 'name', unique=True),
     )
 
     id = Column(Integer, primary_key=True)
@@ -156,30 +192,32 @@ class Branch(Base):
 
 class Milestone(Base):
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_milestone0name'),
+        schema.Index('uniq_milestone0name', 'name', unique=True),
     )
 
     name = Column(String(50))
-    branch_id = Column(Integer, ForeignKey('branches.id'))
-    branch = relationship(Branch, primaryjoin=branch_id == Branch.id)
+    branch_id = Column(Integer, ForeignKey('branches.id'), index=True)
+    branch = relationship(Branch, primaryjoin=branch_id == Branch.id,
+                          lazy='joined')
     released = Column(Boolean, default=False)
     undefined = Column(Boolean, default=False)
-    tasks = relationship('Task', backref='milestone')
+    tasks = relationship('Task', backref='milestone', lazy='subquery')
 
 
 class Story(Base):
     __tablename__ = 'stories'
     _STORY_PRIORITIES = ('Undefined', 'Low', 'Medium', 'High', 'Critical')
 
-    creator_id = Column(Integer, ForeignKey('users.id'))
-    creator = relationship(User, primaryjoin=creator_id == User.id)
+    creator_id = Column(Integer, ForeignKey('users.id'), index=True)
+    creator = relationship(User, primaryjoin=creator_id == User.id,
+                           lazy='joined')
     title = Column(Unicode(100))
     description = Column(UnicodeText())
     is_bug = Column(Boolean, default=True)
     priority = Column(Enum(*_STORY_PRIORITIES, name='priority'))
-    tasks = relationship('Task', backref='story')
-    comments = relationship('Comment', backref='story')
-    tags = relationship('StoryTag', backref='story')
+    tasks = relationship('Task', backref='story', lazy='subquery')
+    comments = relationship('Comment', backref='story', lazy='subquery')
+    tags = relationship('StoryTag', backref='story', lazy='subquery')
 
 
 class Task(Base):
@@ -187,10 +225,12 @@ class Task(Base):
 
     title = Column(Unicode(100), nullable=True)
     status = Column(Enum(*_TASK_STATUSES, default='Todo'))
-    story_id = Column(Integer, ForeignKey('stories.id'))
-    project_id = Column(Integer, ForeignKey('projects.id'))
-    assignee_id = Column(Integer, ForeignKey('users.id'), nullable=True)
-    milestone_id = Column(Integer, ForeignKey('milestones.id'), nullable=True)
+    story_id = Column(Integer, ForeignKey('stories.id'), index=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
+    assignee_id = Column(Integer, ForeignKey('users.id'), nullable=True,
+                         index=True)
+    milestone_id = Column(Integer, ForeignKey('milestones.id'), nullable=True,
+                          index=True)
 
 
 class Comment(Base):
@@ -199,14 +239,16 @@ class Comment(Base):
     comment_type = Column(String(20))
     content = Column(UnicodeText)
 
-    story_id = Column(Integer, ForeignKey('stories.id'))
-    author_id = Column(Integer, ForeignKey('users.id'), nullable=True)
-    author = relationship('User', primaryjoin=author_id == User.id)
+    story_id = Column(Integer, ForeignKey('stories.id'), index=True)
+    author_id = Column(Integer, ForeignKey('users.id'), nullable=True,
+                       index=True)
+    author = relationship('User', primaryjoin=author_id == User.id,
+                          lazy='joined')
 
 
 class StoryTag(Base):
     __table_args__ = (
-        schema.UniqueConstraint('name', name='uniq_story_tags0name'),
+        schema.Index('uniq_story_tags0name', 'name', unique=True),
     )
     name = Column(String(20))
-    story_id = Column(Integer, ForeignKey('stories.id'))
+    story_id = Column(Integer, ForeignKey('stories.id'), index=True)
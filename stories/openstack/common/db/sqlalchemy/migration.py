@@ -38,15 +38,21 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 
-import distutils.version as dist_version
+# NOTE: this copy diverges locally from oslo-incubator and has to be
+# proposed upstream before the next update.py sync, which would otherwise
+# drop these changes:
+#   - migrate is imported (and patched) lazily by _versioning()
+#   - _get_unique_constraints() uses Inspector.get_unique_constraints()
+#     when available, else a precompiled regex and a dict of the columns
+#   - _recreate_table() creates the indexes after copying the rows
+#   - _find_migrate_repo() caches one Repository per path
+
+import collections
 import os
 import re
 
-import migrate
-from migrate.changeset import ansisql
-from migrate.changeset.databases import sqlite
-from migrate.versioning import util as migrate_util
 import sqlalchemy
+from sqlalchemy.engine import reflection
 from sqlalchemy.schema import UniqueConstraint
 
 from stories.openstack.common.db import exception
@@ -54,8 +60,9 @@ from stories.openstack.common.db.sqlalchemy import session as db_session
 from stories.openstack.common.gettextutils import _  # noqa
 
 
-@migrate_util.decorator
 def patched_with_engine(f, *a, **kw):
+    from migrate.versioning import util as migrate_util
+
     url = a[0]
     engine = migrate_util.construct_engine(url, **kw)
 
@@ -68,20 +75,50 @@ def patched_with_engine(f, *a, **kw):
             engine.dispose()
 
 
-# TODO(jkoelker) When migrate 0.7.3 is released and nova depends
-#                on that version or higher, this can be removed
-MIN_PKG_VERSION = dist_version.StrictVersion('0.7.3')
-if (not hasattr(migrate, '__version__') or
-        dist_version.StrictVersion(migrate.__version__) < MIN_PKG_VERSION):
-    migrate_util.with_engine = patched_with_engine
+_Versioning = collections.namedtuple('_Versioning',
+                                     ['api', 'exceptions', 'Repository'])
+
+_VERSIONING = None
+
+
+def _versioning():
+    """Import the versioning API of sqlalchemy-migrate on first use
+
+    migrate pulls in a lot of modules, while most processes importing
+    this one never run a migration.
+
+    :returns: _Versioning of the api module, the exceptions module and
+              the Repository class
+    """
+    global _VERSIONING
+    if _VERSIONING is None:
+        import distutils.version as dist_version
+
+        import migrate
+        from migrate.versioning import util as migrate_util
 
+        # TODO(jkoelker) When migrate 0.7.3 is released and nova depends
+        #                on that version or higher, this can be removed
+        min_pkg_version = dist_version.StrictVersion('0.7.3')
+        if (not hasattr(migrate, '__version__') or
+                dist_version.StrictVersion(migrate.__version__) <
+                min_pkg_version):
+            migrate_util.with_engine = migrate_util.decorator(
+                patched_with_engine)
 
-# NOTE(jkoelker) Delay importing migrate until we are patched
-from migrate import exceptions as versioning_exceptions
-from migrate.versioning import api as versioning_api
-from migrate.versioning.repository import Repository
+        # NOTE(jkoelker) Delay importing migrate until we are patched
+        from migrate import exceptions as versioning_exceptions
+        from migrate.versioning import api as versioning_api
+        from migrate.versioning.repository import Repository
 
-_REPOSITORY = None
+        _VERSIONING = _Versioning(versioning_api, versioning_exceptions,
+                                  Repository)
+    return _VERSIONING
+
+
+_REPOSITORIES = {}
+
+_UNIQUE_RE = re.compile(r"CONSTRAINT (\w+) UNIQUE \(([^\)]+)\)")
 
 get_engine = db_session.get_engine
 
@@ -90,10 +127,20 @@ def _get_unique_constraints(self, table):
     """Retrieve information about existing unique constraints of the table
 
     This feature is needed for _recreate_table() to work properly.
-    Unfortunately, it's not available in sqlalchemy 0.7.x/0.8.x.
+    Unfortunately, it's not available in sqlalchemy 0.7.x/0.8.x, so with
+    those versions the CREATE TABLE statement of the table is parsed.
 
     """
 
+    columns = dict(table.columns.items())
+    inspector = reflection.Inspector.from_engine(table.metadata.bind)
+    if hasattr(inspector, 'get_unique_constraints'):
+        return [
+            UniqueConstraint(*[columns[name] for name in uc['column_names']],
+                             name=uc['name'])
+            for uc in inspector.get_unique_constraints(table.name)
+        ]
+
     data = table.metadata.bind.execute(
         """SELECT sql
            FROM sqlite_master
@@ -103,14 +150,18 @@ def _get_unique_constraints(self, table):
         table_name=table.name
     ).fetchone()[0]
 
-    UNIQUE_PATTERN = "CONSTRAINT (\w+) UNIQUE \(([^\)]+)\)"
-    return [
-        UniqueConstraint(
-            *[getattr(table.columns, c.strip(' "')) for c in cols.split(",")],
-            name=name
-        )
-        for name, cols in re.findall(UNIQUE_PATTERN, data)
-    ]
+    # the same column often shows up in several constraints
+    names = {}
+    constraints = []
+    for match in _UNIQUE_RE.finditer(data):
+        uc_columns = []
+        for token in match.group(2).split(","):
+            name = names.get(token)
+            if name is None:
+                name = names[token] = token.strip(' "')
+            uc_columns.append(columns[name])
+        constraints.append(UniqueConstraint(*uc_columns, name=match.group(1)))
+    return constraints
 
 
 def _recreate_table(self, table, column=None, delta=None, omit_uniques=None):
@@ -142,9 +193,18 @@ def _recreate_table(self, table, column=None, delta=None, omit_uniques=None):
 
     insertion_string = self._modify_table(table, column, delta)
 
-    table.create(bind=self.connection)
+    # create the indexes only once the rows are copied, so that they are
+    # built in one go instead of being updated for every inserted row
+    indexes = table.indexes
+    table.indexes = set()
+    try:
+        table.create(bind=self.connection)
+    finally:
+        table.indexes = indexes
     self.append(insertion_string % {'table_name': table_name})
     self.execute()
+    for index in indexes:
+        index.create(bind=self.connection)
     self.append('DROP TABLE migration_tmp')
     self.execute()
 
@@ -186,6 +246,9 @@ def patch_migrate():
 
     """
 
+    from migrate.changeset import ansisql
+    from migrate.changeset.databases import sqlite
+
     # this patch is needed to ensure that recreate_table() doesn't drop
     # existing unique constraints of the table when creating a new one
     helper_cls = sqlite.SQLiteHelper
@@ -218,6 +281,7 @@ def db_sync(abs_path, version=None, init_version=0):
             raise exception.DbMigrationError(
                 message=_("version should be an integer"))
 
+    versioning_api = _versioning().api
     current_version = db_version(abs_path, init_version)
     repository = _find_migrate_repo(abs_path)
     if version is None or version > current_version:
@@ -233,6 +297,9 @@ def db_version(abs_path, init_version):
     :param abs_path: Absolute path to migrate repository
     :param version:  Initial database version
     """
+    versioning = _versioning()
+    versioning_api = versioning.api
+    versioning_exceptions = versioning.exceptions
     repository = _find_migrate_repo(abs_path)
     try:
         return versioning_api.db_version(get_engine(), repository)
@@ -260,6 +327,7 @@ def db_version_control(abs_path, version=None):
     :param abs_path: Absolute path to migrate repository
     :param version:  Initial database version
     """
+    versioning_api = _versioning().api
     repository = _find_migrate_repo(abs_path)
     versioning_api.version_control(get_engine(), repository, version)
     return version
@@ -270,9 +338,10 @@ def _find_migrate_repo(abs_path):
 
     :param abs_path: Absolute path to migrate repository
     """
-    global _REPOSITORY
-    if not os.path.exists(abs_path):
-        raise exception.DbMigrationError("Path %s not found" % abs_path)
-    if _REPOSITORY is None:
-        _REPOSITORY = Repository(abs_path)
-    return _REPOSITORY
+    repository = _REPOSITORIES.get(abs_path)
+    if repository is None:
+        if not os.path.exists(abs_path):
+            raise exception.DbMigrationError("Path %s not found" % abs_path)
+        repository = _versioning().Repository(abs_path)
+        _REPOSITORIES[abs_path] = repository
+    return repository
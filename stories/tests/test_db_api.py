@@ -0,0 +1,126 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+test_db_api
+----------------------------------
+
+Tests for `stories.db.sqlalchemy.api` module.
+"""
+
+import os
+
+import fixtures
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy import orm
+from sqlalchemy import pool
+
+from stories.db.sqlalchemy import api
+from stories.db.sqlalchemy import models
+from stories.tests import base
+
+
+class DbTestCase(base.TestCase):
+
+    def _create_engine(self):
+        return sqlalchemy.create_engine('sqlite://')
+
+    def setUp(self):
+        super(DbTestCase, self).setUp()
+        self.engine = self._create_engine()
+        self.addCleanup(self.engine.dispose)
+        models.Base.metadata.create_all(self.engine)
+        self.session = orm.sessionmaker(bind=self.engine,
+                                        autocommit=True)()
+
+    def _names(self):
+        return sorted(user.name for user in self.session.query(models.User))
+
+
+class TestBulkInsert(DbTestCase):
+
+    def test_bulk_insert(self):
+        rows = [{'name': u'user%d' % i, 'email': 'user%d@example.com' % i}
+                for i in range(5)]
+        api.bulk_insert(models.User, rows, session=self.session,
+                        chunk_size=2)
+        self.assertEqual([u'user%d' % i for i in range(5)], self._names())
+
+    def test_bulk_insert_nothing(self):
+        api.bulk_insert(models.User, [], session=self.session)
+        self.assertEqual([], self._names())
+
+
+class TestDisableUniqueIndexes(DbTestCase):
+
+    def _indexes(self):
+        inspector = sqlalchemy.inspect(self.engine)
+        return set(index['name'] for index in inspector.get_indexes('users'))
+
+    def test_indexes_dropped_and_rebuilt(self):
+        unique = set(['uniq_user0name', 'uniq_user0email'])
+        self.assertTrue(unique <= self._indexes())
+        with api.disable_unique_indexes(models.User, self.session) as session:
+            self.assertIs(self.session, session)
+            self.assertFalse(unique & self._indexes())
+            api.bulk_insert(models.User, [{'name': u'a'}, {'name': u'b'}],
+                            session=session)
+        self.assertTrue(unique <= self._indexes())
+        self.assertEqual([u'a', u'b'], self._names())
+
+    def test_error_in_block_is_not_masked(self):
+        def load():
+            with api.disable_unique_indexes(models.User, self.session):
+                raise ValueError('load failed')
+
+        self.assertRaises(ValueError, load)
+        # rolled back rather than left open on the session
+        self.assertIsNone(self.session.transaction)
+
+    def test_duplicates_fail_rebuild(self):
+        def load():
+            with api.disable_unique_indexes(models.User,
+                                            self.session) as session:
+                api.bulk_insert(models.User,
+                                [{'name': u'a'}, {'name': u'a'}],
+                                session=session)
+
+        self.assertRaises(sqlalchemy.exc.IntegrityError, load)
+
+
+class TestDisableUniqueIndexesPooled(DbTestCase):
+    """Run against a file database behind a real connection pool."""
+
+    def _create_engine(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'stories.db')
+        return sqlalchemy.create_engine('sqlite:///' + path,
+                                        poolclass=pool.QueuePool)
+
+    def test_single_connection(self):
+        connections = {}
+
+        def record(conn, cursor, statement, *args):
+            verb = statement.split()[0]
+            if verb in ('DROP', 'CREATE', 'INSERT'):
+                connections.setdefault(verb, set()).add(
+                    id(conn.connection.connection))
+
+        event.listen(self.engine, 'before_cursor_execute', record)
+        with api.disable_unique_indexes(models.User, self.session) as session:
+            api.bulk_insert(models.User, [{'name': u'a'}, {'name': u'b'}],
+                            session=session)
+
+        self.assertEqual(set(['DROP', 'CREATE', 'INSERT']), set(connections))
+        self.assertEqual(1, len(set.union(*connections.values())))
+        self.assertEqual([u'a', u'b'], self._names())
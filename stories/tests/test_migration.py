@@ -0,0 +1,79 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+test_migration
+----------------------------------
+
+Tests for `stories.openstack.common.db.sqlalchemy.migration` module.
+"""
+
+import fixtures
+import sqlalchemy
+
+from stories.openstack.common.db.sqlalchemy import migration
+from stories.tests import base
+
+
+class TestGetUniqueConstraints(base.TestCase):
+
+    def setUp(self):
+        super(TestGetUniqueConstraints, self).setUp()
+        # parse the CREATE TABLE statement even on sqlalchemy releases
+        # that can reflect unique constraints themselves
+        self.useFixture(fixtures.MonkeyPatch(
+            'sqlalchemy.engine.reflection.Inspector.get_unique_constraints',
+            fixtures.MonkeyPatch.delete))
+
+        engine = sqlalchemy.create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        meta = sqlalchemy.MetaData(bind=engine)
+        sqlalchemy.Table(
+            'things', meta,
+            sqlalchemy.Column('id', sqlalchemy.Integer, primary_key=True),
+            sqlalchemy.Column('a', sqlalchemy.Integer),
+            sqlalchemy.Column('b', sqlalchemy.Integer),
+            sqlalchemy.Column('order', sqlalchemy.Integer),
+            sqlalchemy.UniqueConstraint('a', name='uniq_things0a'),
+            sqlalchemy.UniqueConstraint('b', 'order',
+                                        name='uniq_things0b0order'),
+        )
+        meta.create_all()
+        self.table = sqlalchemy.Table('things',
+                                      sqlalchemy.MetaData(bind=engine),
+                                      autoload=True)
+
+    def _constraints(self):
+        return sorted(
+            (uc.name, [c.name for c in uc.columns])
+            for uc in migration._get_unique_constraints(None, self.table))
+
+    def test_parse_create_table(self):
+        self.assertEqual([('uniq_things0a', ['a']),
+                          ('uniq_things0b0order', ['b', 'order'])],
+                         self._constraints())
+
+    def test_constraints_use_table_columns(self):
+        for uc in migration._get_unique_constraints(None, self.table):
+            for column in uc.columns:
+                self.assertIs(self.table.c[column.name], column)
+
+    def test_inspector_preferred(self):
+        def get_unique_constraints(inspector, table_name):
+            self.assertEqual('things', table_name)
+            return [{'name': 'uniq_things0b0a', 'column_names': ['b', 'a']}]
+
+        self.useFixture(fixtures.MonkeyPatch(
+            'sqlalchemy.engine.reflection.Inspector.get_unique_constraints',
+            get_unique_constraints))
+        self.assertEqual([('uniq_things0b0a', ['b', 'a'])],
+                         self._constraints())
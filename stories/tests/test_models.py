@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+test_models
+----------------------------------
+
+Tests for `stories.db.sqlalchemy.models` module.
+"""
+
+import datetime
+
+from sqlalchemy import orm
+
+from stories.db.sqlalchemy import models
+from stories.tests import base
+
+
+class TestAsDict(base.TestCase):
+
+    def setUp(self):
+        super(TestAsDict, self).setUp()
+        orm.configure_mappers()
+
+    def _models(self):
+        return [models.User, models.Team, models.Project, models.Group,
+                models.Branch, models.Milestone, models.Story, models.Task,
+                models.Comment, models.StoryTag]
+
+    def _populated(self, model):
+        instance = model()
+        for i, column in enumerate(model.__table__.columns):
+            setattr(instance, column.key, i)
+        instance.created_at = datetime.datetime(2013, 12, 10)
+        return instance
+
+    def test_every_model_has_its_own_as_dict(self):
+        for model in self._models():
+            self.assertIn('as_dict', model.__dict__)
+
+    def test_as_dict_matches_generic(self):
+        for model in self._models():
+            instance = self._populated(model)
+            self.assertEqual(models.StoriesBase.as_dict(instance),
+                             instance.as_dict())
+
+    def test_as_dict_of_empty_instance(self):
+        for model in self._models():
+            instance = model()
+            self.assertEqual(models.StoriesBase.as_dict(instance),
+                             instance.as_dict())
+
+    def test_as_dict_keys(self):
+        story = models.Story(title=u'A story')
+        d = story.as_dict()
+        self.assertEqual(set(c.name for c in models.Story.__table__.columns),
+                         set(d))
+        self.assertEqual(u'A story', d['title'])